@@ -1,35 +1,124 @@
+from dataclasses import dataclass
+import functools
+import importlib.util
+import io
+import os
+import re
 import tkinter as tk
 from tkinter import filedialog, messagebox
+import numpy as np
 import pandas as pd
 from docx import Document
 from tkinter import ttk
+import zipfile
+from xml.sax.saxutils import escape
 
-def generate_missed_homework_report(file_path):
-    df = pd.read_excel(file_path)
-    score_columns = df.columns[4:]
-    missed_assignments = {}
+# python-calamine streams cell values without building a full workbook model;
+# fall back to pandas' default engine when it is not installed, or when pandas
+# predates 2.2 and does not know the engine yet
+PANDAS_VERSION = tuple(int(part) for part in re.findall(r'\d+', pd.__version__)[:2])
+EXCEL_ENGINE = "calamine" if PANDAS_VERSION >= (2, 2) and importlib.util.find_spec("python_calamine") else None
 
-    for index, row in df.iterrows():
-        student_name = f"{row['First Name']} {row['Last Name']}"
-        missed_assignments[student_name] = []
-        
-        for column in score_columns:
-            if row[column] == 0:
-                missed_assignments[student_name].append(column)
+def read_excel(file_path):
+    return pd.read_excel(file_path, engine=EXCEL_ENGINE)
 
-    return missed_assignments
+@dataclass
+class Report:
+    # One entry per spreadsheet row, kept as parallel columns
+    names: np.ndarray
+    missed: list[list[str]]
 
-def write_report_to_word(missed_assignments, word_file_path):
+def generate_missed_homework_report(file_path):
+    # Re-use the finished report until the file on disk changes, so saving it
+    # again skips both the workbook parse and the scan
+    stat = os.stat(file_path)
+    return _build_report(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=1)
+def _build_report(file_path, mtime_ns, size):
+    df = read_excel(file_path)
+    scores = df.iloc[:, 4:]
+    score_columns = np.asarray(scores.columns.astype(str), dtype=object)
+    mask = scores.to_numpy() == 0
+    row_any = mask.any(axis=1)
+    first_names = df['First Name'].to_numpy().astype(str)
+    last_names = df['Last Name'].to_numpy().astype(str)
+    student_names = np.char.add(np.char.add(first_names, ' '), last_names)
+    # Only rows with at least one zero need their labels pulled out
+    missed = [[] for _ in range(len(df))]
+    for i in np.flatnonzero(row_any):
+        missed[i] = score_columns[mask[i]].tolist()
+
+    return Report(names=student_names, missed=missed)
+
+PARAGRAPH_XML = '<w:p><w:pPr><w:pStyle w:val="{style}"/></w:pPr><w:r>{{}}</w:r></w:p>'
+EMPTY_PARAGRAPH_XML = '<w:p/>'
+RUN_SPECIAL_XML = {'\t': '<w:tab/>', '\n': '<w:br/>', '\r': '<w:br/>'}
+RUN_SPECIAL_CHARS = re.compile(r'([\t\n\r])')
+# Characters outside the XML 1.0 Char range (e.g. \x0b, which calamine decodes
+# from a cell's _x000B_) would make document.xml unreadable
+INVALID_XML_CHARS = re.compile('[^\t\n\r\u0020-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]')
+
+def run_content_xml(text):
+    # Fail like python-docx does, before anything is written to disk
+    if INVALID_XML_CHARS.search(text):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+    # Like python-docx, tabs and line breaks (e.g. Alt+Enter in a header) get
+    # their own elements; inside <w:t> Word would show them as spaces
+    parts = []
+    for piece in RUN_SPECIAL_CHARS.split(text):
+        if piece in RUN_SPECIAL_XML:
+            parts.append(RUN_SPECIAL_XML[piece])
+        elif piece:
+            parts.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+    return ''.join(parts)
+
+@functools.lru_cache(maxsize=1)
+def report_skeleton():
+    # Unpack the python-docx skeleton once: every zip member as-is, with
+    # word/document.xml split where the student paragraphs get spliced in
     doc = Document()
     doc.add_heading('Missed Homework Report', 0)
-
-    for student, assignments in missed_assignments.items():
-        doc.add_heading(student, level=1)
+    # Resolve the paragraph styles once and bake their ids into the templates
+    heading_xml = PARAGRAPH_XML.format(style=doc.styles['Heading 1'].style_id)
+    bullet_xml = PARAGRAPH_XML.format(style=doc.styles['List Bullet'].style_id)
+    buf = io.BytesIO()
+    doc.save(buf)
+    members = []
+    with zipfile.ZipFile(buf) as src:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == 'word/document.xml':
+                xml = data.decode('utf-8')
+                end = xml.rindex('<w:sectPr')
+                data = (xml[:end], xml[end:])
+            members.append((item, data))
+    return members, heading_xml, bullet_xml
+
+def write_report_to_word(report, word_file_path):
+    # Assemble the student paragraphs as raw WordprocessingML and splice them
+    # into a python-docx skeleton, rather than building each one through the API
+    members, heading_xml, bullet_xml = report_skeleton()
+    headings = [heading_xml.format(run_content_xml(student)) for student in report.names]
+    # The same few assignment labels repeat for every student, so format each once
+    bullets = {}
+    parts = []
+    for heading, assignments in zip(headings, report.missed):
+        parts.append(heading)
         for assignment in assignments:
-            doc.add_paragraph(f" {assignment}", style='ListBullet')
-        doc.add_paragraph("")
-
-    doc.save(word_file_path)
+            bullet = bullets.get(assignment)
+            if bullet is None:
+                bullet = bullets[assignment] = bullet_xml.format(run_content_xml(f" {assignment}"))
+            parts.append(bullet)
+        parts.append(EMPTY_PARAGRAPH_XML)
+    body = ''.join(parts)
+
+    with zipfile.ZipFile(word_file_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item, data in members:
+            if isinstance(data, tuple):
+                head, tail = data
+                data = (head + body + tail).encode('utf-8')
+            dst.writestr(item, data)
 
 def browse_excel_file():
     filename = filedialog.askopenfilename(filetypes=(("Excel files", "*.xlsx;*.xls"), ("All files", "*.*")))
@@ -50,8 +139,8 @@ def generate_report():
         return
 
     try:
-        missed_assignments = generate_missed_homework_report(excel_file_path)
-        write_report_to_word(missed_assignments, word_file_path)
+        report = generate_missed_homework_report(excel_file_path)
+        write_report_to_word(report, word_file_path)
         messagebox.showinfo("Success", "Report has been successfully generated.")
     except Exception as e:
         messagebox.showerror("Error", f"An error occurred: {e}")